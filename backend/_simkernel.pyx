@@ -0,0 +1,66 @@
+# cython: language_level=3
+"""
+Cython top-k cosine kernel for the semantic cache.
+Build in place with: python setup.py build_ext --inplace
+"""
+
+cimport cython
+import numpy as np
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def topk_i8(
+    const signed char[:, ::1] embeddings,
+    const signed char[::1] query,
+    const float[::1] scales,
+    float query_scale,
+    int k,
+):
+    """
+    Find the k int8 rows most similar to an int8 query.
+
+    Args:
+        embeddings: Contiguous int8 matrix of shape (N, d)
+        query: Contiguous int8 vector of shape (d,)
+        scales: Per-row quantization scales of shape (N,)
+        query_scale: Quantization scale of query
+        k: Number of candidates to return
+
+    Returns:
+        Tuple of (row indices, scores), best first
+    """
+    cdef Py_ssize_t n = embeddings.shape[0]
+    cdef Py_ssize_t d = embeddings.shape[1]
+    cdef Py_ssize_t i, j, pos
+    cdef int acc
+    cdef float score
+
+    if k > n:
+        k = n
+    top_indices = np.full(k, -1, dtype=np.intp)
+    top_scores = np.full(k, -np.inf, dtype=np.float32)
+    if k <= 0:
+        return top_indices, top_scores
+
+    cdef Py_ssize_t[::1] indices_view = top_indices
+    cdef float[::1] scores_view = top_scores
+
+    for i in range(n):
+        acc = 0
+        for j in range(d):
+            acc = acc + embeddings[i, j] * query[j]
+        score = acc / (scales[i] * query_scale)
+
+        # Insert into the sorted top-k buffer
+        if score > scores_view[k - 1]:
+            pos = k - 1
+            while pos > 0 and scores_view[pos - 1] < score:
+                scores_view[pos] = scores_view[pos - 1]
+                indices_view[pos] = indices_view[pos - 1]
+                pos -= 1
+            scores_view[pos] = score
+            indices_view[pos] = i
+
+    return top_indices, top_scores
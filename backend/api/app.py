@@ -12,22 +12,37 @@ try:
 except ImportError:
     pass  # pysqlite3 not installed, will use system sqlite3
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
+import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import functools
+import hashlib
+import json
 import os
 import sys
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
+import time
+import msgspec
+
+try:
+    from typing import Annotated
+except ImportError:
+    from typing_extensions import Annotated  # Python 3.8
 
 # Add backend directory to path for imports (must be before RAG imports)
 backend_dir = Path(__file__).resolve().parent.parent
 if str(backend_dir) not in sys.path:
     sys.path.insert(0, str(backend_dir))
 
-# Import RAG components
-from rag.furniture_retriever import FurnitureRetriever
-from rag.rag_inference import RAGInference
+# RAG components (chromadb, sentence-transformers, torch) are imported lazily in
+# initialize_rag_components() so /health and app import stay fast
+from cache import QueryCache, make_key, normalize_query, open_persistent_cache
+from semantic_cache import SemanticCache, warm_up
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -37,11 +52,79 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend integration
 
+# Compress JSON responses (repeated keys across items compress well)
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+app.config["COMPRESS_MIN_SIZE"] = 500
+# Streamed compression buffers until the end, which would delay batch-search frames
+app.config["COMPRESS_STREAMS"] = False
+Compress(app)
+
+
+# Request bodies (decoded and validated straight from bytes by msgspec)
+PositiveInt = Annotated[int, msgspec.Meta(ge=1)]
+
+
+class SearchRequest(msgspec.Struct):
+    """Body of POST /api/search"""
+
+    query: str
+    n_results: PositiveInt = 15
+    filters: Optional[Dict[str, Any]] = None
+
+
+class RecommendationRequest(msgspec.Struct):
+    """Body of POST /api/recommendations"""
+
+    prompt: str
+    n_results: PositiveInt = 15
+    filters: Optional[Dict[str, Any]] = None
+    furniture_types: List[str] = []
+
+
+class EnhancePromptRequest(msgspec.Struct):
+    """Body of POST /api/enhance-prompt"""
+
+    prompt: str
+    room_type: Optional[str] = None
+    style: Optional[str] = None
+    n_items: PositiveInt = 15
+
+
+class BatchQuery(msgspec.Struct):
+    """One query of POST /api/batch-search"""
+
+    query: Optional[str] = None  # Missing queries are reported per item
+    n_results: PositiveInt = 15
+    filters: Optional[Dict[str, Any]] = None
+
+
+class BatchSearchRequest(msgspec.Struct):
+    """Body of POST /api/batch-search"""
+
+    queries: List[BatchQuery]
+
+
 # Global variables for RAG components
 retriever = None
 rag_inference = None
 # Update path to point to data/furniture_db (use resolve() to get absolute path)
 DB_PATH = str(Path(__file__).resolve().parent.parent.parent / "data" / "furniture_db")
+# On-disk tier of the response cache (set RAG_CACHE_DIR="" to disable)
+CACHE_DIR = os.getenv(
+    "RAG_CACHE_DIR",
+    str(Path(__file__).resolve().parent.parent.parent / "data" / "rag_cache"),
+)
+query_cache = QueryCache(
+    max_size=2000,
+    ttl_seconds=300,
+    persistent=open_persistent_cache(CACHE_DIR),
+    persistent_ttl_seconds=3600,
+)
+semantic_cache = SemanticCache(threshold=0.95, max_entries=5000)
+# Pool running batch-search groups (ChromaDB releases the GIL during search)
+executor = ThreadPoolExecutor(max_workers=int(os.getenv("RAG_BATCH_WORKERS", "4")))
+# Prebuilt /api/stats and /api/filters payloads (ts == 0 forces a rebuild)
+_stats_cache = {"ts": 0, "data": None}
 
 
 def initialize_rag_components():
@@ -55,10 +138,30 @@ def initialize_rag_components():
         if not os.path.exists(DB_PATH):
             raise FileNotFoundError(f"Database not found at {DB_PATH}")
 
-        # Initialize retriever and RAG inference
+        # Import and initialize retriever and RAG inference
+        from rag.furniture_retriever import FurnitureRetriever
+        from rag.rag_inference import RAGInference
+
+        # With gunicorn's preload this runs in the master: no collection queries
+        # here, or forked workers can't reopen ChromaDB (see reopen_after_fork)
         retriever = FurnitureRetriever(db_path=DB_PATH)
         rag_inference = RAGInference(db_path=DB_PATH)
 
+        # Smaller HNSW ef_search trades a little recall for faster queries. It
+        # is persisted in the collection, so only change it when asked to
+        ef_search = ef_search_from_env()
+        if ef_search is not None and retriever.set_ef_search(ef_search):
+            logger.info(f"HNSW ef_search set to {ef_search}")
+
+        # Persisted results stay valid until the database is rebuilt
+        invalidate_caches(persistent=False)
+        query_cache.set_version(database_version())
+
+        # Compile the fallback similarity kernel now rather than in the first
+        # lookup; gunicorn workers do it after fork instead (see gunicorn.conf.py)
+        if os.getenv("RAG_WARM_UP_AFTER_FORK", "false").lower() != "true":
+            warm_up()
+
         logger.info("RAG components initialized successfully")
         return True
 
@@ -67,12 +170,177 @@ def initialize_rag_components():
         return False
 
 
+def ef_search_from_env() -> Optional[int]:
+    """Read RAG_EF_SEARCH, or None if unset or invalid (invalid values are logged)"""
+    value = os.getenv("RAG_EF_SEARCH", "").strip()
+    if not value:
+        return None
+    try:
+        ef_search = int(value)
+    except ValueError:
+        ef_search = 0
+    if ef_search < 1:
+        logger.warning(f"Ignoring RAG_EF_SEARCH={value!r}: expected a positive integer")
+        return None
+    return ef_search
+
+
+def reopen_after_fork():
+    """Reopen handles a forked worker can't share with the master process"""
+    # diskcache reopens its SQLite connection lazily on next use
+    if query_cache.persistent is not None:
+        query_cache.persistent.close()
+    # The embedding model stays shared; ChromaDB clients must not be
+    if retriever is not None:
+        retriever.reopen_client()
+    if rag_inference is not None:
+        rag_inference.retriever.client = retriever.client
+
+
+def ojsonify(obj: Any, status: int = 200):
+    """Serialize obj to a JSON response with orjson (handles NumPy scalars/arrays)"""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+def database_version() -> str:
+    """Identify the current database build and search breadth behind cached results"""
+    # stats.json is rewritten on every build
+    stats_path = Path(DB_PATH) / "stats.json"
+    build = str(stats_path.stat().st_mtime_ns) if stats_path.exists() else ""
+    ef_search = retriever.get_ef_search() if retriever is not None else None
+    return f"{build}:ef{ef_search}"
+
+
+def ndjson_line(obj: Any) -> bytes:
+    """Serialize obj as one newline-delimited JSON frame"""
+    return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+
+def decode_body(struct_type):
+    """Decode and validate the JSON request body (raises msgspec.DecodeError)"""
+    return msgspec.json.decode(request.get_data(), type=struct_type)
+
+
+def invalidate_caches(persistent: bool = True):
+    """Drop cached retrieval results and stats (call after any database write)"""
+    query_cache.clear(persistent=persistent)
+    semantic_cache.clear()
+    _stats_cache["ts"] = 0
+
+
+def get_cached_stats(ttl: float = 60) -> Dict[str, Any]:
+    """Get database stats and filter values, rebuilt at most every ttl seconds"""
+    now = time.monotonic()
+    if _stats_cache["data"] is None or now - _stats_cache["ts"] > ttl:
+        stats = retriever.get_stats()
+        filters_body = orjson.dumps(
+            {
+                "success": True,
+                "filters": {
+                    "styles": stats.get("styles", []),
+                    "room_types": stats.get("room_types", []),
+                    "furniture_types": stats.get("furniture_types", []),
+                },
+            }
+        )
+        _stats_cache["data"] = {
+            "stats": stats,
+            "filters_body": filters_body,
+            "filters_etag": make_etag(filters_body),
+        }
+        _stats_cache["ts"] = now
+    return _stats_cache["data"]
+
+
+def make_etag(body: bytes) -> str:
+    """ETag identifying a response body"""
+    return hashlib.blake2b(body).hexdigest()[:16]
+
+
+def conditional_json(body: bytes, etag: str, max_age: int = 60):
+    """Serve a JSON body with its ETag, or 304 if the client already has it"""
+    # flask-compress appends ":<algorithm>" to the ETag of compressed responses
+    client_etags = request.if_none_match.as_set()
+    if any(tag == etag or tag.startswith(f"{etag}:") for tag in client_etags):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={max_age}"
+    return response
+
+
+@functools.lru_cache(maxsize=8192)
+def _img_url(item_id: str) -> str:
+    """Placeholder image URL for a furniture item (images are not in the database)"""
+    return f"https://images.unsplash.com/photo-{hash(item_id) % 1000000000}?w=400"
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call in the default executor without blocking the event loop"""
+    # Not the batch-search executor, so single requests never queue behind a batch
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def cached_retrieve(
+    query: str, n_results: int, filters: Dict = None
+) -> List[Dict[str, Any]]:
+    """Retrieve furniture through the response cache"""
+    key = make_key(query, n_results, filters)
+    results = query_cache.get(key)
+    if results is None:
+        results = await run_blocking(
+            retriever.retrieve, query=query, n_results=n_results, filters=filters
+        )
+        query_cache.put(key, results)
+    return results
+
+
+async def semantic_retrieve(
+    query: str, n_results: int, filters: Dict = None
+) -> List[Dict[str, Any]]:
+    """Retrieve furniture through the response cache, then the semantic cache"""
+    key = make_key(query, n_results, filters)
+    results = query_cache.get(key)
+    if results is not None:
+        return results
+
+    # Repeated prompts reuse their embedding instead of re-running the model
+    query_embedding = semantic_cache.get_embedding(query)
+    if query_embedding is None:
+        query_embedding = await run_blocking(retriever.embed, query)
+        semantic_cache.put_embedding(query, query_embedding)
+
+    # Near-duplicate prompts only share results when n_results/filters match
+    context = make_key("", n_results, filters)
+    results = semantic_cache.lookup(query_embedding, context)
+    if results is None:
+        results = await run_blocking(
+            retriever.retrieve,
+            query=query,
+            n_results=n_results,
+            filters=filters,
+            query_embedding=query_embedding,
+        )
+        semantic_cache.add(query_embedding, context, results)
+        # Only exact retrievals go in the response cache, which /api/search
+        # and /api/batch-search also read
+        query_cache.put(key, results)
+
+    return results
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint"""
     is_ready = retriever is not None and rag_inference is not None
 
-    return jsonify(
+    return ojsonify(
         {
             "status": "healthy" if is_ready else "initializing",
             "ready": is_ready,
@@ -82,7 +350,7 @@ def health_check():
 
 
 @app.route("/api/search", methods=["POST"])
-def search_furniture():
+async def search_furniture():
     """
     Search for furniture items using semantic search
 
@@ -98,24 +366,25 @@ def search_furniture():
     }
     """
     if retriever is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        data = request.get_json()
+        try:
+            req = decode_body(SearchRequest)
+        except msgspec.DecodeError as e:
+            return ojsonify({"error": f"Invalid request body: {e}"}), 400
 
-        # Validate required fields
-        if "query" not in data:
-            return jsonify({"error": "Missing required field: query"}), 400
-
-        query = data["query"]
-        n_results = data.get("n_results", 15)
-        filters = data.get("filters", {})
+        query = req.query
+        n_results = req.n_results
+        filters = req.filters
 
         # Perform retrieval
-        results = retriever.retrieve(query=query, n_results=n_results, filters=filters)
+        results = await cached_retrieve(
+            query=query, n_results=n_results, filters=filters
+        )
 
         return (
-            jsonify(
+            ojsonify(
                 {
                     "success": True,
                     "query": query,
@@ -128,11 +397,11 @@ def search_furniture():
 
     except Exception as e:
         logger.error(f"Error in search_furniture: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/recommendations", methods=["POST"])
-def get_recommendations():
+async def get_recommendations():
     """
     Get furniture recommendations based on user prompt (for frontend integration)
 
@@ -145,25 +414,22 @@ def get_recommendations():
     Response format matches frontend RAGResponse interface
     """
     if retriever is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        import time
-
-        start_time = time.time()
-
-        data = request.get_json()
+        start_time = time.perf_counter()
 
-        # Validate required fields
-        if "prompt" not in data:
-            return jsonify({"error": "Missing required field: prompt"}), 400
+        try:
+            req = decode_body(RecommendationRequest)
+        except msgspec.DecodeError as e:
+            return ojsonify({"error": f"Invalid request body: {e}"}), 400
 
-        prompt = data["prompt"]
-        n_results_requested = data.get("n_results", 15)
-        filters = data.get("filters", {})
+        prompt = req.prompt
+        n_results_requested = req.n_results
+        filters = req.filters
 
         # Handle furniture_types filtering
-        furniture_types = data.get("furniture_types", [])
+        furniture_types = req.furniture_types
         logger.info(f"Received furniture_types: {furniture_types}")
 
         # Mapping of general types to specific patterns in the database
@@ -211,7 +477,7 @@ def get_recommendations():
             logger.info(f"Matching patterns: {matching_patterns}")
 
             # Retrieve more results to ensure we get enough after filtering
-            all_results = retriever.retrieve(
+            all_results = await semantic_retrieve(
                 query=prompt,
                 n_results=n_results_requested * 3,  # Get 3x more to filter
                 filters=filters if filters else None,
@@ -232,7 +498,7 @@ def get_recommendations():
             )
         else:
             # No filtering, retrieve normally
-            results = retriever.retrieve(
+            results = await semantic_retrieve(
                 query=prompt,
                 n_results=n_results_requested,
                 filters=filters if filters else None,
@@ -240,28 +506,28 @@ def get_recommendations():
             logger.info(f"Retrieved {len(results)} results without filtering")
 
         # Transform results to match frontend FurnitureItem interface
-        recommendations = []
-        for item in results:
-            furniture_item = {
+        recommendations = [
+            {
                 "id": item["id"],
                 "name": item["name"],
                 "category": item["furniture_type"],
                 "style": item["feel"],
                 "price": 0.0,  # Placeholder - price not in database
                 "description": item["description"],
-                "imageUrl": f"https://images.unsplash.com/photo-{hash(item['id']) % 1000000000}?w=400",  # Placeholder
+                "imageUrl": _img_url(item["id"]),  # Placeholder
                 "dimensions": item.get("dimensions", "N/A"),
                 "material": item.get("material", "N/A"),
                 "color": item.get("color", "N/A"),
                 "relevanceScore": item.get("relevance_score", 0.0),
             }
-            recommendations.append(furniture_item)
+            for item in results
+        ]
 
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
 
         # Return in RAGResponse format
         return (
-            jsonify(
+            ojsonify(
                 {
                     "query": prompt,
                     "recommendations": recommendations,
@@ -274,7 +540,7 @@ def get_recommendations():
 
     except Exception as e:
         logger.error(f"Error in get_recommendations: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/enhance-prompt", methods=["POST"])
@@ -291,19 +557,18 @@ def enhance_prompt():
     }
     """
     if rag_inference is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        data = request.get_json()
-
-        # Validate required fields
-        if "prompt" not in data:
-            return jsonify({"error": "Missing required field: prompt"}), 400
+        try:
+            req = decode_body(EnhancePromptRequest)
+        except msgspec.DecodeError as e:
+            return ojsonify({"error": f"Invalid request body: {e}"}), 400
 
-        user_prompt = data["prompt"]
-        room_type = data.get("room_type", None)
-        style = data.get("style", None)
-        n_items = data.get("n_items", 15)
+        user_prompt = req.prompt
+        room_type = req.room_type
+        style = req.style
+        n_items = req.n_items
 
         # Create enhanced prompt
         enhanced_prompt = rag_inference.create_prompt_with_context(
@@ -311,7 +576,7 @@ def enhance_prompt():
         )
 
         return (
-            jsonify(
+            ojsonify(
                 {
                     "success": True,
                     "original_prompt": user_prompt,
@@ -325,50 +590,47 @@ def enhance_prompt():
 
     except Exception as e:
         logger.error(f"Error in enhance_prompt: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/stats", methods=["GET"])
 def get_database_stats():
     """Get statistics about the furniture database"""
     if retriever is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        stats = retriever.get_stats()
-        return jsonify({"success": True, "stats": stats}), 200
+        stats = get_cached_stats()["stats"]
+        body = orjson.dumps(
+            {
+                "success": True,
+                "stats": stats,
+                "cache": query_cache.stats(),
+                "semantic_cache": semantic_cache.stats(),
+            },
+            option=orjson.OPT_SERIALIZE_NUMPY,
+        )
+        # The body includes live cache counters, so the ETag covers all of it
+        return conditional_json(body, make_etag(body))
 
     except Exception as e:
         logger.error(f"Error in get_database_stats: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/filters", methods=["GET"])
 def get_available_filters():
     """Get available filter values (styles, room types, furniture types)"""
     if retriever is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        stats = retriever.get_stats()
-
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "filters": {
-                        "styles": stats.get("styles", []),
-                        "room_types": stats.get("room_types", []),
-                        "furniture_types": stats.get("furniture_types", []),
-                    },
-                }
-            ),
-            200,
-        )
+        cached = get_cached_stats()
+        return conditional_json(cached["filters_body"], cached["filters_etag"])
 
     except Exception as e:
         logger.error(f"Error in get_available_filters: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/batch-search", methods=["POST"])
@@ -383,57 +645,139 @@ def batch_search():
             {"query": "wooden table", "n_results": 10}
         ]
     }
+
+    Response is newline-delimited JSON: a {"type": "batch_start"} frame, one
+    {"type": "result", "index": ...} frame per query as soon as it resolves
+    (not necessarily in request order), then a {"type": "batch_end"} frame.
     """
     if retriever is None:
-        return jsonify({"error": "RAG system not initialized"}), 503
+        return ojsonify({"error": "RAG system not initialized"}), 503
 
     try:
-        data = request.get_json()
+        try:
+            req = decode_body(BatchSearchRequest)
+        except msgspec.DecodeError as e:
+            return ojsonify({"error": f"Invalid request body: {e}"}), 400
+
+        queries = req.queries
+
+        # Collapse repeated (query, n_results, filters) entries so each is
+        # retrieved once, serve cache hits directly and group the misses by
+        # filters so each group is answered by one batched ChromaDB query
+        ready = []
+        cached = []
+        groups = {}
+        positions = {}
+        for i, query_item in enumerate(queries):
+            if query_item.query is None:
+                ready.append(
+                    {"type": "result", "index": i, "error": "Missing query field"}
+                )
+                continue
 
-        if "queries" not in data or not isinstance(data["queries"], list):
-            return jsonify({"error": "Missing or invalid 'queries' field"}), 400
+            n_results = query_item.n_results
+            filters = query_item.filters
+            key = make_key(query_item.query, n_results, filters)
+            if key in positions:
+                positions[key].append(i)
+                continue
+            positions[key] = [i]
 
-        results = []
-        for query_item in data["queries"]:
-            if "query" not in query_item:
-                results.append({"error": "Missing query field"})
+            query_results = query_cache.get(key)
+            if query_results is not None:
+                cached.append((key, query_results))
                 continue
 
-            try:
-                query_results = retriever.retrieve(
-                    query=query_item["query"],
-                    n_results=query_item.get("n_results", 15),
-                    filters=query_item.get("filters", {}),
-                )
-                results.append(
+            group_key = json.dumps(filters or {}, sort_keys=True)
+            groups.setdefault(group_key, []).append((i, key, n_results))
+
+        def result_frames(key, query_results):
+            """One frame per original position of a deduplicated query"""
+            for i in positions[key]:
+                yield ndjson_line(
                     {
+                        "type": "result",
+                        "index": i,
                         "success": True,
-                        "query": query_item["query"],
+                        "query": queries[i].query,
                         "results": query_results,
                     }
                 )
-            except Exception as e:
-                results.append(
-                    {"success": False, "query": query_item["query"], "error": str(e)}
-                )
 
-        return jsonify({"success": True, "batch_results": results}), 200
+        # Start the groups now so they run while earlier frames are streamed.
+        # Entries that differ only in n_results share one row of the group query
+        pending = {}
+        for members in groups.values():
+            rows = {}
+            for i, _, _ in members:
+                rows.setdefault(normalize_query(queries[i].query), queries[i].query)
+            future = executor.submit(
+                retriever.retrieve_batch,
+                queries=list(rows.values()),
+                n_results=max(n_results for _, _, n_results in members),
+                filters=queries[members[0][0]].filters,
+            )
+            pending[future] = (members, list(rows))
+
+        def generate():
+            yield ndjson_line({"type": "batch_start", "n": len(queries)})
+            for frame in ready:
+                yield ndjson_line(frame)
+            for key, query_results in cached:
+                yield from result_frames(key, query_results)
+
+            for future in as_completed(pending):
+                members, row_queries = pending[future]
+                try:
+                    group_results = future.result()
+                except Exception as e:
+                    logger.error(f"Error in batch_search: {str(e)}")
+                    for _, key, _ in members:
+                        for i in positions[key]:
+                            frame = {
+                                "type": "result",
+                                "index": i,
+                                "success": False,
+                                "query": queries[i].query,
+                                "error": str(e),
+                            }
+                            yield ndjson_line(frame)
+                    continue
+
+                # Results are ranked, so trimming gives each query its own top n
+                rows = dict(zip(row_queries, group_results))
+                for i, key, n_results in members:
+                    query_results = rows[normalize_query(queries[i].query)][:n_results]
+                    query_cache.put(key, query_results)
+                    yield from result_frames(key, query_results)
+
+            yield ndjson_line({"type": "batch_end"})
+
+        return app.response_class(
+            stream_with_context(generate()), mimetype="application/x-ndjson"
+        )
 
     except Exception as e:
         logger.error(f"Error in batch_search: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({"error": "Endpoint not found"}), 404
+    return ojsonify({"error": "Endpoint not found"}), 404
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
-    return jsonify({"error": "Internal server error"}), 500
+    return ojsonify({"error": "Internal server error"}), 500
+
+
+# Preloading servers (gunicorn.conf.py sets RAG_PRELOAD) import this module in the
+# parent process before forking workers; load the model there so workers share it
+if os.getenv("RAG_PRELOAD", "false").lower() == "true":
+    initialize_rag_components()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration for the DecoPlan RAG Flask backend
+
+Usage (from backend/api):
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import sys
+
+# Load the embedding model and ChromaDB client once in the master process so
+# forked workers share those pages copy-on-write instead of loading their own
+preload_app = True
+os.environ.setdefault("RAG_PRELOAD", "true")
+# Tokenizer thread pools don't survive fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+# Neither do Numba's, so each worker compiles its kernel in post_fork
+os.environ.setdefault("RAG_WARM_UP_AFTER_FORK", "true")
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = 4
+
+
+def post_fork(server, worker):
+    """Reopen handles inherited from the master and warm up this worker"""
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        app_module.reopen_after_fork()
+        app_module.warm_up()
@@ -0,0 +1,169 @@
+"""
+Response cache for furniture retrieval.
+Caches retriever results keyed on the normalized (query, n_results, filters) tuple
+so repeated requests skip the embedding model and ChromaDB entirely. An optional
+on-disk tier (diskcache) keeps results across restarts.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None  # diskcache not installed, cache stays in memory only
+
+# Reserved persistent-tier key recording which database build the entries belong to
+_VERSION_KEY = "__version__"
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query as cache keys compare it (case, surrounding whitespace)."""
+    return query.strip().lower()
+
+
+def make_key(query: str, n_results: int, filters: Optional[Dict] = None) -> str:
+    """
+    Build a cache key for a retrieval request.
+
+    Args:
+        query: Search query or user prompt
+        n_results: Number of results requested
+        filters: Optional metadata filters (None and {} are equivalent)
+
+    Returns:
+        Hex digest identifying the normalized request
+    """
+    payload = [normalize_query(query), n_results, sorted((filters or {}).items())]
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def open_persistent_cache(directory: str, size_limit: int = 2**30):
+    """
+    Open an on-disk cache for QueryCache's persistent tier.
+
+    Args:
+        directory: Directory holding the SQLite-backed cache
+        size_limit: Maximum size of the cache in bytes
+
+    Returns:
+        diskcache.Cache, or None if diskcache is not installed or directory is empty
+    """
+    if diskcache is None or not directory:
+        return None
+    return diskcache.Cache(directory, size_limit=size_limit)
+
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL and an optional on-disk tier."""
+
+    def __init__(
+        self,
+        max_size: int = 2000,
+        ttl_seconds: float = 300,
+        persistent=None,
+        persistent_ttl_seconds: float = 3600,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl_seconds: Seconds an entry stays valid after it is stored
+            persistent: Optional diskcache.Cache consulted on memory misses
+            persistent_ttl_seconds: Seconds an entry stays valid in the persistent tier
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self.persistent_ttl_seconds = persistent_ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        # Fall back to the persistent tier, promoting hits into memory
+        if self.persistent is not None:
+            value = self.persistent.get(key)
+            if value is not None:
+                self._put_memory(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """Store value under key in memory and, if enabled, on disk."""
+        self._put_memory(key, value)
+        if self.persistent is not None:
+            self.persistent.set(key, value, expire=self.persistent_ttl_seconds)
+
+    def _put_memory(self, key: str, value: Any) -> None:
+        """Store value in memory, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, persistent: bool = True) -> None:
+        """
+        Drop all entries (call after any write to the furniture database).
+
+        Args:
+            persistent: Also clear the on-disk tier
+        """
+        with self._lock:
+            self._entries.clear()
+        if persistent and self.persistent is not None:
+            self.persistent.clear()
+
+    def set_version(self, version: str) -> None:
+        """
+        Discard persisted entries written against a different database build.
+
+        Args:
+            version: Identifier of the current database build
+        """
+        if self.persistent is None:
+            return
+        if self.persistent.get(_VERSION_KEY) != version:
+            self.persistent.clear()
+            self.persistent.set(_VERSION_KEY, version)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self.persistent is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
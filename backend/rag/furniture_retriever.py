@@ -13,9 +13,11 @@ except ImportError:
     pass  # pysqlite3 not installed, will use system sqlite3
 
 import chromadb
+from chromadb.api.client import SharedSystemClient
 from chromadb.config import Settings
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
+import numpy as np
 from typing import List, Dict, Optional
 import json
 
@@ -44,9 +46,7 @@ class FurnitureRetriever:
         self.embedding_model = SentenceTransformer(model_name)
 
         # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=str(self.db_path), settings=Settings(anonymized_telemetry=False)
-        )
+        self.client = self._open_client()
 
         # Load statistics if available
         stats_path = self.db_path / "stats.json"
@@ -56,12 +56,87 @@ class FurnitureRetriever:
         else:
             self.stats = {}
 
+    def _open_client(self):
+        """Open a ChromaDB client on the database."""
+        return chromadb.PersistentClient(
+            path=str(self.db_path), settings=Settings(anonymized_telemetry=False)
+        )
+
+    def reopen_client(self) -> None:
+        """
+        Replace the ChromaDB client with a fresh one (call in a forked child).
+
+        ChromaDB's Rust runtime doesn't survive fork(), so an inherited client
+        hangs on its first query. Clients are cached per path, so the cache is
+        cleared first or PersistentClient would hand back the inherited one.
+        This only helps if the parent never queried (or added to) a collection,
+        which starts that runtime for the whole process.
+        """
+        SharedSystemClient.clear_system_cache()
+        self.client = self._open_client()
+
+    def set_ef_search(
+        self, ef_search: int, collection_name: str = "furniture_catalog"
+    ) -> bool:
+        """
+        Set the HNSW search breadth of a collection.
+
+        ChromaDB stores ef_search as persisted collection configuration rather
+        than a per-query parameter, so this applies to every later query.
+        Lower values (e.g., 20) favor speed, higher values (e.g., 200) recall.
+
+        Args:
+            ef_search: Number of candidates explored per HNSW search
+            collection_name: Name of the ChromaDB collection
+
+        Returns:
+            True if applied, False if this ChromaDB version can't update it
+        """
+        collection = self.client.get_collection(collection_name)
+        try:
+            collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+        except Exception as e:
+            print(f"Could not set ef_search={ef_search}: {e}")
+            return False
+        return True
+
+    def get_ef_search(
+        self, collection_name: str = "furniture_catalog"
+    ) -> Optional[int]:
+        """
+        Get the HNSW search breadth currently persisted for a collection.
+
+        Args:
+            collection_name: Name of the ChromaDB collection
+
+        Returns:
+            ef_search, or None if this ChromaDB version doesn't report it
+        """
+        try:
+            configuration = self.client.get_collection(collection_name).configuration
+            return (configuration.get("hnsw") or {}).get("ef_search")
+        except Exception:
+            return None
+
+    def embed(self, query: str) -> np.ndarray:
+        """
+        Embed a query with the same model used to build the database.
+
+        Args:
+            query: User's furniture query or room description
+
+        Returns:
+            Query embedding vector
+        """
+        return self.embedding_model.encode(query)
+
     def retrieve(
         self,
         query: str,
         n_results: int = 10,
         collection_name: str = "furniture_catalog",
         filters: Optional[Dict] = None,
+        query_embedding: Optional[np.ndarray] = None,
     ) -> List[Dict]:
         """
         Retrieve relevant furniture based on query.
@@ -71,6 +146,7 @@ class FurnitureRetriever:
             n_results: Number of results to return
             collection_name: Name of the ChromaDB collection
             filters: Optional metadata filters (e.g., {"furniture_type": "Sofa"})
+            query_embedding: Optional precomputed embedding of query (from embed())
 
         Returns:
             List of furniture items with metadata and relevance scores
@@ -78,8 +154,10 @@ class FurnitureRetriever:
         # Get collection
         collection = self.client.get_collection(collection_name)
 
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        # Generate query embedding (unless the caller already has one)
+        if query_embedding is None:
+            query_embedding = self.embed(query)
+        query_embedding = np.asarray(query_embedding).tolist()
 
         # Build where clause for filtering
         where_clause = None
@@ -91,24 +169,68 @@ class FurnitureRetriever:
             query_embeddings=[query_embedding], n_results=n_results, where=where_clause
         )
 
-        # Format results
+        return self._format_results(results, 0)
+
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        n_results: int = 10,
+        collection_name: str = "furniture_catalog",
+        filters: Optional[Dict] = None,
+    ) -> List[List[Dict]]:
+        """
+        Retrieve relevant furniture for several queries in a single ChromaDB call.
+
+        Args:
+            queries: User furniture queries or room descriptions
+            n_results: Number of results to return per query
+            collection_name: Name of the ChromaDB collection
+            filters: Optional metadata filters applied to every query
+
+        Returns:
+            One list of furniture items per query, in input order
+        """
+        if not queries:
+            return []
+
+        # Get collection
+        collection = self.client.get_collection(collection_name)
+
+        # Embed all queries in one pass
+        query_embeddings = self.embedding_model.encode(queries, batch_size=32)
+
+        # Query the database once for the whole batch
+        results = collection.query(
+            query_embeddings=np.asarray(query_embeddings).tolist(),
+            n_results=n_results,
+            where=filters if filters else None,
+        )
+
+        return [self._format_results(results, row) for row in range(len(queries))]
+
+    @staticmethod
+    def _format_results(results: Dict, row: int) -> List[Dict]:
+        """Convert one query's rows of a ChromaDB query result to furniture items."""
+        ids = results["ids"][row]
+        metadatas = results["metadatas"][row]
+        documents = results["documents"][row]
+        distances = results["distances"][row]
+
         formatted_results = []
-        for i in range(len(results["ids"][0])):
+        for i in range(len(ids)):
             formatted_results.append(
                 {
-                    "id": results["ids"][0][i],
-                    "name": results["metadatas"][0][i]["name"],
-                    "furniture_type": results["metadatas"][0][i]["furniture_type"],
-                    "material": results["metadatas"][0][i]["material"],
-                    "color": results["metadatas"][0][i]["color"],
-                    "feel": results["metadatas"][0][i]["feel"],
-                    "is_accessory": results["metadatas"][0][i].get(
-                        "is_accessory", "N/A"
-                    ),
-                    "dimensions": results["metadatas"][0][i].get("dimensions", "N/A"),
-                    "description": results["documents"][0][i],
+                    "id": ids[i],
+                    "name": metadatas[i]["name"],
+                    "furniture_type": metadatas[i]["furniture_type"],
+                    "material": metadatas[i]["material"],
+                    "color": metadatas[i]["color"],
+                    "feel": metadatas[i]["feel"],
+                    "is_accessory": metadatas[i].get("is_accessory", "N/A"),
+                    "dimensions": metadatas[i].get("dimensions", "N/A"),
+                    "description": documents[i],
                     "relevance_score": 1
-                    - results["distances"][0][i],  # Convert distance to similarity
+                    - distances[i],  # Convert distance to similarity
                 }
             )
 
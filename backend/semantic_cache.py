@@ -0,0 +1,366 @@
+"""
+Semantic cache for furniture retrieval.
+Returns a previously retrieved result set when a new query embedding is close
+enough (cosine similarity) to a cached one, skipping the ChromaDB query. Also
+remembers the embedding of recent prompts so repeats skip the embedding model.
+"""
+
+import functools
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from _simkernel import topk_i8 as cython_topk_i8
+except ImportError:
+    cython_topk_i8 = None  # not built (python setup.py build_ext --inplace)
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None  # simsimd not installed, will score with Numba or NumPy
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt for exact-match embedding reuse (case and whitespace)."""
+    return re.sub(r"\s+", " ", prompt.strip().lower())
+
+
+def quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Quantize a vector to int8 with a per-vector scale.
+
+    Args:
+        vector: float32 vector
+
+    Returns:
+        Tuple of (int8 vector, scale) where vector ~= quantized / scale
+    """
+    peak = float(np.max(np.abs(vector)))
+    scale = 127.0 / peak if peak > 0 else 1.0
+    return np.round(vector * scale).astype(np.int8), scale
+
+
+def cosine_scores(
+    embeddings: np.ndarray,
+    scales: np.ndarray,
+    query: np.ndarray,
+    query_scale: float,
+) -> np.ndarray:
+    """
+    Cosine similarity between a quantized query and every row of a quantized matrix.
+
+    Args:
+        embeddings: Contiguous int8 matrix of shape (N, d)
+        scales: Per-row quantization scales of shape (N,)
+        query: Contiguous int8 vector of shape (d,)
+        query_scale: Quantization scale of query
+
+    Returns:
+        Similarity scores of shape (N,)
+    """
+    if simsimd is not None:
+        # Cosine is scale invariant, so int8 rows need no dequantization
+        distances = simsimd.cdist(query.reshape(1, -1), embeddings, metric="cosine")
+        return 1 - np.asarray(distances).ravel()
+
+    # Rows and query are unit length before quantization, so the dequantized
+    # dot product gives the cosine
+    dots = embeddings.astype(np.float32) @ query.astype(np.float32)
+    return dots / (scales * query_scale)
+
+
+@functools.lru_cache(maxsize=None)
+def numba_topk_i8() -> Optional[Callable]:
+    """
+    Compile the Numba top-k kernel on first use.
+
+    Importing numba takes most of a second, so it is deferred until a lookup
+    actually needs it (no Cython kernel and no SimSIMD).
+
+    Returns:
+        Kernel taking (embeddings, query, scales, query_scale, k), or None if
+        numba is not installed
+    """
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None  # numba not installed, will score with NumPy
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def topk_i8(embeddings, query, scales, query_scale, k):
+        """Numba kernel: int8 dot products in parallel, then a serial top-k insert."""
+        n, d = embeddings.shape
+        scores = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            acc = 0
+            for j in range(d):
+                acc += np.int32(embeddings[i, j]) * np.int32(query[j])
+            scores[i] = acc / (scales[i] * query_scale)
+
+        k = min(k, n)
+        top_indices = np.full(k, -1, dtype=np.int64)
+        top_scores = np.full(k, -np.inf, dtype=np.float32)
+        for i in range(n):
+            score = scores[i]
+            if score > top_scores[k - 1]:
+                pos = k - 1
+                while pos > 0 and top_scores[pos - 1] < score:
+                    top_scores[pos] = top_scores[pos - 1]
+                    top_indices[pos] = top_indices[pos - 1]
+                    pos -= 1
+                top_scores[pos] = score
+                top_indices[pos] = i
+
+        return top_indices, top_scores
+
+    return topk_i8
+
+
+def warm_up() -> None:
+    """
+    Compile the Numba kernel ahead of the first lookup if top_candidates will use it.
+
+    Lookups hold the cache lock, so call this off the request path, and not in
+    a process that forks afterwards (Numba's threads don't survive fork()).
+    """
+    if cython_topk_i8 is not None or simsimd is not None:
+        return
+    kernel = numba_topk_i8()
+    if kernel is not None:
+        kernel(
+            np.zeros((1, 8), dtype=np.int8),
+            np.zeros(8, dtype=np.int8),
+            np.ones(1, dtype=np.float32),
+            1.0,
+            1,
+        )
+
+
+def top_candidates(
+    embeddings: np.ndarray,
+    scales: np.ndarray,
+    query: np.ndarray,
+    query_scale: float,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k rows most similar to a quantized query.
+
+    Args:
+        embeddings: Contiguous int8 matrix of shape (N, d)
+        scales: Per-row quantization scales of shape (N,)
+        query: Contiguous int8 vector of shape (d,)
+        query_scale: Quantization scale of query
+        k: Number of candidates to return
+
+    Returns:
+        Tuple of (row indices, scores), best first
+    """
+    # Prefer the Cython kernel, then SimSIMD, then Numba, then NumPy
+    if cython_topk_i8 is not None:
+        return cython_topk_i8(embeddings, query, scales, float(query_scale), k)
+    numba_kernel = numba_topk_i8() if simsimd is None else None
+    if numba_kernel is not None:
+        return numba_kernel(embeddings, query, scales, float(query_scale), k)
+
+    scores = cosine_scores(embeddings, scales, query, query_scale)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top, scores[top]
+
+
+class SemanticCache:
+    """Thread-safe cache of result sets keyed by int8-quantized query embeddings."""
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        max_entries: int = 5000,
+        initial_capacity: int = 64,
+        top_k: int = 8,
+        max_prompts: int = 10000,
+    ):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached query to count as a hit
+            max_entries: Maximum number of cached queries before the oldest is replaced
+            initial_capacity: Rows allocated up front (doubled as the cache fills)
+            top_k: Most similar cached queries checked for matching request parameters
+            max_prompts: Maximum number of remembered prompt embeddings (LRU)
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.initial_capacity = initial_capacity
+        self.top_k = top_k
+        self.max_prompts = max_prompts
+
+        # Row i of _embeddings (int8, quantized with _scales[i]) belongs to
+        # _contexts[i] / _payloads[i]
+        self._embeddings = None
+        self._scales = None
+        self._contexts = []
+        self._payloads = []
+        self._size = 0
+        self._oldest = 0
+        self._prompt_embeddings = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.embedding_hits = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.ascontiguousarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get_embedding(self, prompt: str) -> Optional[np.ndarray]:
+        """
+        Get the remembered embedding of a prompt.
+
+        Args:
+            prompt: User prompt (matched after normalize_prompt)
+
+        Returns:
+            Embedding, or None if the prompt hasn't been embedded recently
+        """
+        key = normalize_prompt(prompt)
+        with self._lock:
+            embedding = self._prompt_embeddings.get(key)
+            if embedding is not None:
+                self._prompt_embeddings.move_to_end(key)
+                self.embedding_hits += 1
+            return embedding
+
+    def put_embedding(self, prompt: str, embedding: np.ndarray) -> None:
+        """
+        Remember the embedding of a prompt, evicting the least recently used.
+
+        Args:
+            prompt: User prompt
+            embedding: Its embedding from the retriever's model
+        """
+        key = normalize_prompt(prompt)
+        with self._lock:
+            self._prompt_embeddings[key] = embedding
+            self._prompt_embeddings.move_to_end(key)
+            while len(self._prompt_embeddings) > self.max_prompts:
+                self._prompt_embeddings.popitem(last=False)
+
+    def lookup(self, embedding, context: Hashable) -> Optional[Any]:
+        """
+        Find the cached result set for the most similar query.
+
+        Args:
+            embedding: Query embedding
+            context: Request parameters that must match exactly (n_results, filters)
+
+        Returns:
+            Cached payload, or None if no cached query reaches the threshold
+        """
+        query, query_scale = quantize(self._normalize(embedding))
+
+        with self._lock:
+            if self._size == 0:
+                self.misses += 1
+                return None
+
+            indices, scores = top_candidates(
+                self._embeddings[: self._size],
+                self._scales[: self._size],
+                query,
+                query_scale,
+                self.top_k,
+            )
+
+            # Best-scoring candidate whose request parameters match
+            for i, score in zip(indices, scores):
+                if score < self.threshold:
+                    break
+                if self._contexts[i] == context:
+                    self.hits += 1
+                    return self._payloads[i]
+
+            self.misses += 1
+            return None
+
+    def add(self, embedding, context: Hashable, payload: Any) -> None:
+        """
+        Cache a result set under its query embedding.
+
+        Args:
+            embedding: Query embedding
+            context: Request parameters the payload was retrieved with
+            payload: Result set to return on future hits
+        """
+        vector, scale = quantize(self._normalize(embedding))
+
+        with self._lock:
+            if self._embeddings is None:
+                capacity = min(self.initial_capacity, self.max_entries)
+                self._embeddings = np.empty((capacity, vector.shape[0]), dtype=np.int8)
+                self._scales = np.empty(capacity, dtype=np.float32)
+                self._contexts = [None] * capacity
+                self._payloads = [None] * capacity
+
+            capacity = self._embeddings.shape[0]
+            if self._size == capacity and capacity < self.max_entries:
+                capacity = min(capacity * 2, self.max_entries)
+                self._embeddings = np.resize(
+                    self._embeddings, (capacity, self._embeddings.shape[1])
+                )
+                self._scales = np.resize(self._scales, capacity)
+                self._contexts.extend([None] * (capacity - len(self._contexts)))
+                self._payloads.extend([None] * (capacity - len(self._payloads)))
+
+            # Fill free rows first, then overwrite the oldest entry
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = self._oldest
+                self._oldest = (self._oldest + 1) % self.max_entries
+                self.evictions += 1
+
+            self._embeddings[slot] = vector
+            self._scales[slot] = scale
+            self._contexts[slot] = context
+            self._payloads[slot] = payload
+
+    def clear(self) -> None:
+        """
+        Drop all cached result sets (call after any write to the furniture database).
+
+        Remembered prompt embeddings only depend on the model, so they are kept.
+        """
+        with self._lock:
+            self._embeddings = None
+            self._scales = None
+            self._contexts = []
+            self._payloads = []
+            self._size = 0
+            self._oldest = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        with self._lock:
+            return {
+                "size": self._size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "prompt_embeddings": len(self._prompt_embeddings),
+                "embedding_hits": self.embedding_hits,
+            }
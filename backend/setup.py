@@ -0,0 +1,26 @@
+"""
+Build the optional Cython similarity kernel used by the semantic cache
+
+Usage (from backend/):
+    pip install cython
+    python setup.py build_ext --inplace
+
+-mavx2 targets x86-64; drop it from extra_compile_args on other platforms.
+"""
+
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+setup(
+    name="decoplan-simkernel",
+    ext_modules=cythonize(
+        [
+            Extension(
+                "_simkernel",
+                ["_simkernel.pyx"],
+                extra_compile_args=["-O3", "-mavx2", "-ffast-math"],
+            )
+        ],
+        language_level=3,
+    ),
+)
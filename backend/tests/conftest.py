@@ -0,0 +1,9 @@
+"""
+Shared pytest configuration for the backend tests
+"""
+
+import os
+
+# Keep the API's response cache in memory so tests never read or wipe the
+# on-disk tier (must be set before api.app is imported)
+os.environ["RAG_CACHE_DIR"] = ""
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the retrieval response cache
+"""
+
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cache as cache_module
+from cache import QueryCache, make_key, open_persistent_cache
+import semantic_cache as semantic_cache_module
+from semantic_cache import SemanticCache
+
+
+def test_make_key_normalizes_query():
+    """Test that case, surrounding whitespace and empty filters don't change the key."""
+    assert make_key("Modern Sofa ", 10, {}) == make_key("modern sofa", 10, None)
+    assert make_key("modern sofa", 10) != make_key("modern sofa", 5)
+    assert make_key("sofa", 10, {"a": 1, "b": 2}) == make_key(
+        "sofa", 10, {"b": 2, "a": 1}
+    )
+    print("✓ Cache keys are normalized")
+
+
+def test_hit_and_miss_counters():
+    """Test get/put bookkeeping."""
+    cache = QueryCache(max_size=10, ttl_seconds=60)
+    assert cache.get("k") is None
+    cache.put("k", [1, 2, 3])
+    assert cache.get("k") == [1, 2, 3]
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+    print(f"✓ Cache counters: {stats}")
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = QueryCache(max_size=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+    print("✓ LRU eviction working")
+
+
+def test_ttl_expiry():
+    """Test that entries expire after ttl_seconds."""
+    cache = QueryCache(max_size=10, ttl_seconds=0.01)
+    cache.put("k", "v")
+    time.sleep(0.02)
+    assert cache.get("k") is None
+    print("✓ TTL expiry working")
+
+
+@pytest.mark.skipif(cache_module.diskcache is None, reason="diskcache not installed")
+def test_persistent_tier_survives_restart(tmp_path):
+    """Test that entries written to disk are served by a fresh cache instance."""
+    cache = QueryCache(persistent=open_persistent_cache(str(tmp_path)))
+    cache.set_version("build-1")
+    cache.put("k", [{"id": "FURN-1"}])
+
+    restarted = QueryCache(persistent=open_persistent_cache(str(tmp_path)))
+    restarted.set_version("build-1")
+    assert restarted.get("k") == [{"id": "FURN-1"}]
+    assert restarted.stats()["disk_hits"] == 1
+
+    rebuilt = QueryCache(persistent=open_persistent_cache(str(tmp_path)))
+    rebuilt.set_version("build-2")
+    assert rebuilt.get("k") is None
+    print("✓ Persistent tier survives restarts and resets on rebuild")
+
+
+def test_semantic_cache_hit_on_similar_embedding():
+    """Test that a near-identical embedding returns the cached payload."""
+    cache = SemanticCache(threshold=0.95, max_entries=10)
+    base = np.array([1.0, 0.0, 0.0, 0.0])
+    cache.add(base, "ctx", ["sofa"])
+
+    assert cache.lookup(base + np.array([0.0, 0.05, 0.0, 0.0]), "ctx") == ["sofa"]
+    assert cache.lookup(np.array([0.0, 1.0, 0.0, 0.0]), "ctx") is None
+    assert cache.lookup(base, "other-ctx") is None
+    print(f"✓ Semantic cache lookups: {cache.stats()}")
+
+
+def test_semantic_cache_grows_and_evicts_oldest():
+    """Test growth past the initial capacity and replacement of the oldest entry."""
+    cache = SemanticCache(threshold=0.99, max_entries=4, initial_capacity=1)
+    vectors = np.eye(5)
+    for i, vector in enumerate(vectors):
+        cache.add(vector, "ctx", i)
+
+    assert cache.lookup(vectors[0], "ctx") is None
+    assert cache.lookup(vectors[4], "ctx") == 4
+    assert cache.lookup(vectors[1], "ctx") == 1
+    assert cache.stats()["size"] == 4
+    assert cache.stats()["evictions"] == 1
+    print("✓ Semantic cache eviction working")
+
+
+def _quantized_fixture():
+    """Random unit vectors quantized like the semantic cache stores them."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    quantized = [semantic_cache_module.quantize(v) for v in vectors]
+    embeddings = np.stack([q for q, _ in quantized])
+    scales = np.array([s for _, s in quantized], dtype=np.float32)
+    query, query_scale = quantized[7]
+
+    expected = embeddings.astype(np.float32) @ query.astype(np.float32)
+    expected /= scales * query_scale
+    return embeddings, scales, query, query_scale, expected
+
+
+@pytest.mark.parametrize(
+    "kernel_name",
+    [
+        pytest.param(
+            "numba",
+            marks=pytest.mark.skipif(
+                importlib.util.find_spec("numba") is None,
+                reason="numba not installed",
+            ),
+        ),
+        pytest.param(
+            "cython",
+            marks=pytest.mark.skipif(
+                semantic_cache_module.cython_topk_i8 is None,
+                reason="Cython kernel not built",
+            ),
+        ),
+    ],
+)
+def test_topk_kernels_match_numpy(kernel_name):
+    """Test that the compiled int8 top-k kernels agree with the NumPy scores."""
+    embeddings, scales, query, query_scale, expected = _quantized_fixture()
+    if kernel_name == "numba":
+        kernel = semantic_cache_module.numba_topk_i8()
+    else:
+        kernel = semantic_cache_module.cython_topk_i8
+
+    indices, scores = kernel(embeddings, query, scales, float(query_scale), 5)
+
+    assert indices[0] == 7
+    assert list(indices) == list(np.argsort(-expected)[:5])
+    assert np.allclose(scores, expected[indices], atol=1e-4)
+    print(f"✓ {kernel_name} matches NumPy")
+
+
+@pytest.mark.parametrize(
+    "backend",
+    [
+        pytest.param(
+            "simsimd",
+            marks=pytest.mark.skipif(
+                semantic_cache_module.simsimd is None, reason="simsimd not installed"
+            ),
+        ),
+        "numpy",
+    ],
+)
+def test_top_candidates_scoring_backends(backend, monkeypatch):
+    """Test the SimSIMD and NumPy scoring paths of top_candidates on int8 inputs."""
+    embeddings, scales, query, query_scale, expected = _quantized_fixture()
+    monkeypatch.setattr(semantic_cache_module, "cython_topk_i8", None)
+    if backend == "numpy":
+        monkeypatch.setattr(semantic_cache_module, "simsimd", None)
+        monkeypatch.setattr(semantic_cache_module, "numba_topk_i8", lambda: None)
+
+    scores = semantic_cache_module.cosine_scores(embeddings, scales, query, query_scale)
+    assert np.allclose(scores, expected, atol=1e-2)
+
+    indices, top_scores = semantic_cache_module.top_candidates(
+        embeddings, scales, query, query_scale, 5
+    )
+    assert indices[0] == 7
+    assert list(indices) == list(np.argsort(-scores)[:5])
+    assert np.allclose(top_scores, expected[indices], atol=1e-2)
+    print(f"✓ {backend} scoring matches the dequantized dot product")
+
+
+def test_warm_up_compiles_numba_only_when_used(monkeypatch):
+    """Test warm_up compiles the Numba kernel only when it is the chosen backend."""
+    compiled = []
+
+    def fake_numba_topk_i8():
+        def kernel(*args):
+            compiled.append(args)
+
+        return kernel
+
+    monkeypatch.setattr(semantic_cache_module, "numba_topk_i8", fake_numba_topk_i8)
+    monkeypatch.setattr(semantic_cache_module, "cython_topk_i8", None)
+    monkeypatch.setattr(semantic_cache_module, "simsimd", object())
+    semantic_cache_module.warm_up()
+    assert compiled == []
+
+    monkeypatch.setattr(semantic_cache_module, "simsimd", None)
+    semantic_cache_module.warm_up()
+    assert len(compiled) == 1
+    print("✓ Numba kernel warmed up only as the fallback backend")
+
+
+def test_prompt_embeddings_reused_and_evicted():
+    """Test exact-match prompt embedding reuse with LRU eviction."""
+    cache = SemanticCache(max_prompts=2)
+    cache.put_embedding("Modern  Sofa", np.array([1.0, 0.0]))
+    cache.put_embedding("oak table", np.array([0.0, 1.0]))
+
+    assert cache.get_embedding("  modern sofa ") is not None
+    cache.put_embedding("rattan chair", np.array([1.0, 1.0]))
+
+    assert cache.get_embedding("oak table") is None
+    assert cache.get_embedding("modern sofa")[0] == 1.0
+    assert cache.stats()["embedding_hits"] == 2
+    print("✓ Prompt embeddings reused with LRU eviction")
@@ -3,14 +3,20 @@
 Integration tests for Flask API endpoints
 """
 
+import json
+import os
+import subprocess
 import sys
+import textwrap
 from pathlib import Path
+import numpy as np
 import pytest
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import app after path is set
+import api.app as app_module
 from api.app import app, DB_PATH
 
 
@@ -84,6 +90,316 @@ def test_api_recommendations_endpoint_structure(client):
         print(f"✓ Recommendations endpoint working, found {data.get('totalResults', 0)} items")
 
 
+class StubRetriever:
+    """Stand-in retriever that echoes the query back as n_results ranked items."""
+
+    def __init__(self):
+        self.calls = []
+        self.batch_calls = []
+        self.stats_calls = 0
+
+    def embed(self, query):
+        return np.array([len(query), 1.0, 0.0])
+
+    def retrieve(self, query, n_results=10, filters=None, **kwargs):
+        self.calls.append(query)
+        return [
+            {
+                "id": f"ID-{query}-{rank}",
+                "name": query,
+                "furniture_type": "Sofa",
+                "feel": "Modern",
+                "description": f"A {query}",
+                "relevance_score": 0.9 - rank * 0.01,
+            }
+            for rank in range(n_results)
+        ]
+
+    def retrieve_batch(self, queries, n_results=10, filters=None, **kwargs):
+        self.batch_calls.append((list(queries), n_results))
+        return [self.retrieve(query, n_results, filters) for query in queries]
+
+    def get_stats(self):
+        self.stats_calls += 1
+        return {"total_items": 1, "styles": ["Modern"], "room_types": [], "furniture_types": []}
+
+
+@pytest.fixture
+def stub_retriever(monkeypatch):
+    """Install a StubRetriever as the app's retriever, starting from empty caches."""
+    stub = StubRetriever()
+    monkeypatch.setattr(app_module, "retriever", stub)
+    app_module.invalidate_caches()
+    return stub
+
+
+def test_batch_search_streams_ndjson(client, stub_retriever):
+    """Test /api/batch-search streams one indexed frame per query with a stub retriever."""
+    queries = [{"query": f"stub query {i}", "n_results": 1} for i in range(6)]
+    queries[4]["filters"] = {"feel": "Modern"}
+    queries.insert(2, {"n_results": 1})
+    response = client.post('/api/batch-search', json={"queries": queries})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    frames = [json.loads(line) for line in response.get_data().splitlines()]
+    assert frames[0] == {"type": "batch_start", "n": 7}
+    assert frames[-1] == {"type": "batch_end"}
+
+    results = {frame["index"]: frame for frame in frames[1:-1]}
+    assert sorted(results) == list(range(7))
+    assert results[2]["error"] == "Missing query field"
+    for i, query in enumerate(queries):
+        if "query" in query:
+            assert results[i]["query"] == query["query"]
+            assert results[i]["results"][0]["name"] == query["query"]
+    print(f"✓ Batch search streamed {len(frames)} frames for a stub retriever")
+
+
+def test_batch_search_trims_group_to_each_n_results(client, stub_retriever):
+    """Test one batched query per filter group, trimmed to each entry's n_results."""
+    queries = [
+        {"query": "stub chair", "n_results": 2},
+        {"query": "stub desk", "n_results": 5},
+        {"query": "stub shelf", "n_results": 3},
+    ]
+    response = client.post('/api/batch-search', json={"queries": queries})
+    frames = [json.loads(line) for line in response.get_data().splitlines()]
+    results = {frame["index"]: frame["results"] for frame in frames[1:-1]}
+
+    batch_queries = ["stub chair", "stub desk", "stub shelf"]
+    assert stub_retriever.batch_calls == [(batch_queries, 5)]
+    for i, query in enumerate(queries):
+        assert len(results[i]) == query["n_results"]
+        key = app_module.make_key(query["query"], query["n_results"], None)
+        assert app_module.query_cache.get(key) == results[i]
+    print("✓ Batch group queried once with the largest n_results and trimmed")
+
+
+def test_batch_search_deduplicates_queries(client, stub_retriever):
+    """Test repeated batch-search queries are retrieved once and fanned out."""
+    queries = [
+        {"query": "stub lamp", "n_results": 1},
+        {"query": "stub rug", "n_results": 1},
+        {"query": "  Stub Lamp ", "n_results": 1},
+        {"query": "stub lamp", "n_results": 1},
+        {"query": "stub lamp", "n_results": 1, "filters": {"feel": "Modern"}},
+    ]
+    response = client.post('/api/batch-search', json={"queries": queries})
+    assert response.status_code == 200
+
+    frames = [json.loads(line) for line in response.get_data().splitlines()]
+    results = {frame["index"]: frame for frame in frames[1:-1]}
+    assert sorted(results) == list(range(len(queries)))
+    assert results[2]["query"] == "  Stub Lamp "
+    assert results[0]["results"] == results[2]["results"] == results[3]["results"]
+    assert sorted(stub_retriever.calls) == ["stub lamp", "stub lamp", "stub rug"]
+    calls = len(stub_retriever.calls)
+    print(f"✓ {len(queries)} batch queries answered by {calls} retrievals")
+
+
+def test_batch_search_shares_rows_across_n_results(client, stub_retriever):
+    """Test entries differing only in n_results share one row of the group query."""
+    queries = [
+        {"query": "stub lamp", "n_results": 1},
+        {"query": "stub rug", "n_results": 1},
+        {"query": "Stub Lamp", "n_results": 2},
+    ]
+    response = client.post('/api/batch-search', json={"queries": queries})
+    frames = [json.loads(line) for line in response.get_data().splitlines()]
+    results = {frame["index"]: frame["results"] for frame in frames[1:-1]}
+
+    assert stub_retriever.batch_calls == [(["stub lamp", "stub rug"], 2)]
+    assert [len(results[i]) for i in range(3)] == [1, 1, 2]
+    assert results[2][:1] == results[0]
+    print("✓ Batch group embedded each distinct query once")
+
+
+def test_recommendations_with_stub_retriever(client, stub_retriever):
+    """Test /api/recommendations response shape and repeat-prompt caching."""
+    for _ in range(2):
+        response = client.post(
+            '/api/recommendations', json={"prompt": "stub sofa", "n_results": 1}
+        )
+        assert response.status_code == 200
+
+    data = response.get_json()
+    assert data["totalResults"] == 1
+    item = data["recommendations"][0]
+    assert item["category"] == "Sofa"
+    assert item["material"] == "N/A"
+    assert item["imageUrl"].startswith("https://images.unsplash.com/photo-")
+    assert stub_retriever.calls == ["stub sofa"]
+    print("✓ Recommendations served from cache on repeat")
+
+
+def test_semantic_hit_does_not_leak_into_search(client, stub_retriever):
+    """Test a near-duplicate recommendation hit isn't cached as an exact search result."""
+    for prompt in ["modern sofa", "a modern sofa"]:
+        response = client.post(
+            '/api/recommendations', json={"prompt": prompt, "n_results": 1}
+        )
+        assert response.get_json()["recommendations"][0]["name"] == "modern sofa"
+    assert stub_retriever.calls == ["modern sofa"]
+
+    response = client.post('/api/search', json={"query": "a modern sofa", "n_results": 1})
+    assert response.get_json()["results"][0]["name"] == "a modern sofa"
+    assert stub_retriever.calls == ["modern sofa", "a modern sofa"]
+    print("✓ Semantic hits stay out of the exact-match response cache")
+
+
+def test_invalid_request_body_returns_400(client, stub_retriever):
+    """Test that missing or mistyped fields are rejected before retrieval."""
+    response = client.post('/api/recommendations', json={"n_results": 5})
+    assert response.status_code == 400
+    assert 'prompt' in response.get_json()['error']
+
+    response = client.post('/api/search', json={"query": "sofa", "n_results": "five"})
+    assert response.status_code == 400
+
+    response = client.post('/api/search', json={"query": "sofa", "n_results": 0})
+    assert response.status_code == 400
+
+    response = client.post(
+        '/api/batch-search', json={"queries": [{"query": "sofa", "n_results": -1}]}
+    )
+    assert response.status_code == 400
+    assert stub_retriever.calls == []
+    print("✓ Invalid request bodies rejected with 400")
+
+
+def test_null_filters_are_accepted(client, stub_retriever):
+    """Test that "filters": null means no filters, as before request validation."""
+    response = client.post('/api/search', json={"query": "sofa", "filters": None})
+    assert response.status_code == 200
+
+    response = client.post(
+        '/api/recommendations', json={"prompt": "chair", "filters": None}
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        '/api/batch-search', json={"queries": [{"query": "lamp", "filters": None}]}
+    )
+    frames = [json.loads(line) for line in response.get_data().splitlines()]
+    assert frames[1]["success"] is True
+    assert stub_retriever.calls == ["sofa", "chair", "lamp"]
+    print("✓ Null filters accepted by search, recommendations and batch search")
+
+
+def test_stats_and_filters_are_cached(client, stub_retriever):
+    """Test /api/stats and /api/filters share one cached get_stats() call."""
+    assert client.get('/api/filters').get_json()["filters"]["styles"] == ["Modern"]
+    assert client.get('/api/stats').get_json()["stats"]["total_items"] == 1
+    assert client.get('/api/filters').status_code == 200
+    assert stub_retriever.stats_calls == 1
+
+    app_module.invalidate_caches()
+    client.get('/api/stats')
+    assert stub_retriever.stats_calls == 2
+    print("✓ Stats payload served from cache")
+
+
+def test_filters_return_304_for_matching_etag(client, stub_retriever):
+    """Test /api/filters revalidation with If-None-Match."""
+    response = client.get('/api/filters')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert 'max-age=60' in response.headers['Cache-Control']
+
+    response = client.get('/api/filters', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+    response = client.get('/api/filters', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    print(f"✓ Filters revalidated with ETag {etag}")
+
+
+def test_ef_search_from_env_ignores_invalid_values(monkeypatch):
+    """Test RAG_EF_SEARCH parsing: unset or invalid values leave ef_search alone."""
+    for value, expected in [("", None), ("64", 64), ("fast", None), ("0", None)]:
+        monkeypatch.setenv("RAG_EF_SEARCH", value)
+        assert app_module.ef_search_from_env() == expected
+    monkeypatch.delenv("RAG_EF_SEARCH")
+    assert app_module.ef_search_from_env() is None
+    print("✓ RAG_EF_SEARCH validated")
+
+
+def test_database_version_tracks_ef_search(stub_retriever):
+    """Test the persisted-cache version changes with the collection's ef_search."""
+    stub_retriever.get_ef_search = lambda: 100
+    default_version = app_module.database_version()
+    stub_retriever.get_ef_search = lambda: 40
+    assert app_module.database_version() != default_version
+    print("✓ database_version includes ef_search")
+
+
+BACKEND_DIR = str(Path(__file__).resolve().parent.parent)
+
+# Builds a one-item database, or (given "fork") initializes the app in the
+# master and queries ChromaDB from a forked worker, as gunicorn's preload does
+FORK_SCRIPT = textwrap.dedent(
+    """
+    import faulthandler, json, os, sys
+    sys.path.insert(0, sys.argv[1])
+    import numpy as np
+    import chromadb
+
+    db_path = sys.argv[2]
+    if sys.argv[3] == "build":
+        metadata = {"name": "Sofa", "furniture_type": "Sofa", "material": "Oak",
+                    "color": "Grey", "feel": "Modern"}
+        collection = chromadb.PersistentClient(path=db_path).create_collection(
+            "furniture_catalog"
+        )
+        collection.add(ids=["A"], embeddings=[[1.0, 0.0, 0.0]],
+                       metadatas=[metadata], documents=["A sofa"])
+        with open(os.path.join(db_path, "stats.json"), "w") as f:
+            json.dump({"total_items": 1}, f)
+        sys.exit(0)
+
+    import rag.furniture_retriever as retriever_module
+
+    class StubModel:
+        def __init__(self, model_name):
+            pass
+
+        def encode(self, query, **kwargs):
+            return np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+    retriever_module.SentenceTransformer = StubModel
+    import api.app as app_module
+
+    app_module.DB_PATH = db_path
+    assert app_module.initialize_rag_components()
+
+    pid = os.fork()
+    if pid == 0:
+        faulthandler.dump_traceback_later(30, exit=True)
+        app_module.reopen_after_fork()
+        results = app_module.retriever.retrieve("sofa", n_results=1)
+        os._exit(0 if results[0]["id"] == "A" else 1)
+    _, status = os.waitpid(pid, 0)
+    sys.exit(os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1)
+    """
+)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_forked_worker_can_query_after_preload(tmp_path):
+    """Test a worker forked after initialize_rag_components() can query ChromaDB."""
+    env = dict(os.environ, RAG_CACHE_DIR="", TOKENIZERS_PARALLELISM="false")
+    for mode in ["build", "fork"]:
+        subprocess.run(
+            [sys.executable, "-c", FORK_SCRIPT, BACKEND_DIR, str(tmp_path), mode],
+            env=env,
+            check=True,
+            timeout=120,
+        )
+    print("✓ Forked worker queried ChromaDB after reopening its client")
+
+
 def test_404_handler(client):
     """Test 404 error handler."""
     response = client.get('/nonexistent/endpoint')